@@ -1,12 +1,15 @@
 import streamlit as st
 from streamlit_option_menu import option_menu
 from github_repo_manager import GithubRepoManager
+import io
 import os
+import hashlib
+import requests_cache
 from dotenv import load_dotenv
 from datetime import datetime
+import numpy as np
 import pandas as pd
 import plotly.express as px
-import plotly.graph_objects as go
 from github import GithubException
 
 COLORS = {
@@ -18,6 +21,52 @@ COLORS = {
     'archived': '#B39DDB'  # Muted deep purple
 }
 
+@st.cache_data(ttl=300, show_spinner=False)
+def _cached_repos_df(_repo_manager, user_login):
+    return _repo_manager.get_repos_dataframe()
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _cached_stats(_repo_manager, user_login):
+    return _repo_manager.get_repo_stats()
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _cached_starred(_repo_manager, user_login):
+    return _repo_manager.get_starred_repos()
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _lang_counts(df_key, language_series):
+    # Counting over categorical codes is proportional to the number of languages, not rows
+    return language_series.astype('category').value_counts().rename_axis('language').reset_index(name='count')
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _top_starred(df_key, starred_df, n=10):
+    # Find the n-th largest count in linear time, then sort only the rows at or above it.
+    # Ties are broken by position, matching nlargest(keep='first').
+    stars = starred_df['stars'].to_numpy()
+    n = min(n, len(stars))
+    if n == 0:
+        return starred_df.iloc[:0]
+    threshold = np.partition(stars, len(stars) - n)[len(stars) - n]
+    candidates = np.flatnonzero(stars >= threshold)
+    order = np.lexsort((candidates, -stars[candidates]))[:n]
+    return starred_df.iloc[candidates[order]]
+
+def get_repos_df(repo_manager):
+    # Held in session state so switching tabs reuses the frame without touching the cache
+    key = f'repos_df_{repo_manager.user.login}'
+    if key not in st.session_state:
+        st.session_state[key] = _cached_repos_df(repo_manager, repo_manager.user.login)
+    return st.session_state[key]
+
+def clear_cached_repo_data():
+    for key in [key for key in st.session_state if key.startswith('repos_df_')]:
+        del st.session_state[key]
+    _cached_repos_df.clear()
+    _cached_stats.clear()
+    _cached_starred.clear()
+    _lang_counts.clear()
+    _top_starred.clear()
+
 def load_token_from_env():
     env_path = os.path.join(os.path.dirname(__file__), 'token.env')
     if os.path.exists(env_path):
@@ -44,12 +93,13 @@ def create_summary(repo_manager, stats):
     """
 
 def format_dataframe(df, format_owned):
-    def highlight_owned(row):
-        if format_owned:
-            color = '#e6f3ff' if row['is_owner'] else '#fff0e6'
-            return [f'background-color: {color}' for _ in row]
-        return ['' for _ in row]
-    return df.style.apply(highlight_owned, axis=1)
+    def highlight_owned(df):
+        # Build every cell's style in one pass rather than calling back once per row
+        colors = np.where(df['is_owner'].to_numpy(), 'background-color: #e6f3ff', 'background-color: #fff0e6')
+        return pd.DataFrame(np.broadcast_to(colors[:, None], df.shape), index=df.index, columns=df.columns)
+    if not format_owned:
+        return df.style
+    return df.style.apply(highlight_owned, axis=None)
 
 def format_datetime(dt):
     return dt.strftime("%b %d, %Y %I:%M %p")
@@ -57,9 +107,8 @@ def format_datetime(dt):
 def delete_repository(repo_manager):
     st.header("Delete Repository")
     
-    # Get list of repositories
-    repos = repo_manager.all_repos
-    repo_names = [repo.name for repo in repos if repo.permissions.admin]
+    # Get list of repositories the user can administer
+    repo_names = repo_manager.admin_repo_names
     
     # Dropdown to select repository
     selected_repo = st.selectbox("Select a repository to delete:", repo_names)
@@ -75,6 +124,7 @@ def delete_repository(repo_manager):
             if confirmation == selected_repo:
                 try:
                     repo_manager.delete_repo(selected_repo)
+                    clear_cached_repo_data()
                     st.success(f"Repository {selected_repo} has been deleted successfully.")
                 except GithubException as e:
                     st.error(f"An error occurred while deleting the repository: {str(e)}")
@@ -84,27 +134,18 @@ def delete_repository(repo_manager):
 def export_to_csv(data, filename):
     current_date = datetime.now().strftime("%Y-%m-%d")
     filename_with_date = f"{current_date}_{filename}"
-    csv_file = data.to_csv(index=False)
+    buf = io.BytesIO()
+    data.to_csv(buf, index=False, chunksize=10_000)
     st.download_button(
         label="Download CSV",
-        data=csv_file,
+        data=buf.getvalue(),
         file_name=filename_with_date,
         mime="text/csv"
     )
 
 def get_all_commits(repo_manager, repos):
-    all_commits = []
-    for repo in repos:
-        commits = repo_manager.get_repo_commits(repo)
-        for commit in commits:
-            all_commits.append({
-                'repo': repo.name,
-                'message': commit.commit.message,
-                'date': commit.commit.author.date,
-                'author': commit.commit.author.name,
-                'url': commit.html_url
-            })
-    return pd.DataFrame(all_commits)
+    # One aliased GraphQL query per batch of repositories instead of a REST call per repository
+    return repo_manager.get_all_commits_graphql(repos)
 
 def create_repository(repo_manager):
     st.header("Create New Repository")
@@ -139,10 +180,19 @@ def create_repository(repo_manager):
                 gitignore_template=gitignore_template if gitignore_template else None,
                 license_template=license_template if license_template else None
             )
+            clear_cached_repo_data()
             st.success(f"Repository '{repo_name}' created successfully! URL: {new_repo.html_url}")
         except GithubException as e:
             st.error(f"An error occurred while creating the repository: {str(e)}")
 
+def create_cached_session(token):
+    # Only PyGithub's REST GETs (the user profile and the all_repos listing) are revalidated through this cache.
+    # GraphQL POSTs and the aiohttp Activity commit fetch bypass it.
+    # requests_cache leaves the Authorization header out of its keys, so each token gets its own cache file
+    token_hash = hashlib.sha256(token.encode()).hexdigest()[:16]
+    cache_name = os.path.join(os.path.dirname(__file__), '.gh_cache', token_hash)
+    return requests_cache.CachedSession(cache_name=cache_name, backend='sqlite', expire_after=3600, cache_control=True)
+
 def initialize_repo_manager():
     token = load_token_from_env()
     if not token:
@@ -152,7 +202,8 @@ def initialize_repo_manager():
         return None, "GitHub token not provided. Please set up your token."
     
     try:
-        repo_manager = GithubRepoManager(token)
+        repo_manager = GithubRepoManager(token, session=create_cached_session(token))
+        repo_manager.user.login  # Fail fast on a bad token; repositories are only listed when needed
         return repo_manager, None
     except Exception as e:
         return None, f"Error initializing GitHub connection: {str(e)}"
@@ -193,14 +244,16 @@ def main():
             default_index=0,
         )
 
+        if st.button("🔄 Refresh"):
+            clear_cached_repo_data()
+
     # Main content
     if selected == "Stats 📊":
         st.header("Repository Statistics 📊")
-        stats = repo_manager.get_repo_stats()
+        stats = _cached_stats(repo_manager, user.login)
         summary = create_summary(repo_manager, stats)
         st.markdown(summary, unsafe_allow_html=True)
         
-        col1, col2, col3 = st.columns(3)
         metrics = [
             ("Total Repositories", stats["Total Repositories"], COLORS['total']),
             (f"Owned by {repo_manager.user.login}", stats[f"Owned by {repo_manager.user.login}"], COLORS['owned']),
@@ -209,16 +262,14 @@ def main():
             ("Forked", stats["Forked"], COLORS['forked']),
             ("Archived", stats["Archived"], COLORS['archived'])
         ]
-        for i, (key, value, color) in enumerate(metrics):
-            if i % 3 == 0:
-                col1.markdown(f"<p style='color:{color};font-weight:bold;font-size:18px;text-align:center;'>{key}</p>", unsafe_allow_html=True)
-                col1.markdown(f"<h2 style='color:{color};font-weight:bold;text-align:center;'>{value}</h2>", unsafe_allow_html=True)
-            elif i % 3 == 1:
-                col2.markdown(f"<p style='color:{color};font-weight:bold;font-size:18px;text-align:center;'>{key}</p>", unsafe_allow_html=True)
-                col2.markdown(f"<h2 style='color:{color};font-weight:bold;text-align:center;'>{value}</h2>", unsafe_allow_html=True)
-            else:
-                col3.markdown(f"<p style='color:{color};font-weight:bold;font-size:18px;text-align:center;'>{key}</p>", unsafe_allow_html=True)
-                col3.markdown(f"<h2 style='color:{color};font-weight:bold;text-align:center;'>{value}</h2>", unsafe_allow_html=True)
+        # One markdown block per column, metrics dealt out left to right
+        cols = st.columns(3)
+        for i, col in enumerate(cols):
+            col.markdown("\n\n".join(
+                f"<p style='color:{color};font-weight:bold;font-size:18px;text-align:center;'>{key}</p>"
+                f"<h2 style='color:{color};font-weight:bold;text-align:center;'>{value}</h2>"
+                for key, value, color in metrics[i::3]
+            ), unsafe_allow_html=True)
 
     elif selected == "Activity 🕒":
         st.header("Recent Activity 🕒")
@@ -234,52 +285,60 @@ def main():
         if filter_owned:
             recent_repos = [repo for repo in recent_repos if repo.owner.login == user.login]
 
-        all_commits = []
+        repo_col, msg_col, date_col, author_col, url_col = [], [], [], [], []
         
-        for i, repo in enumerate(recent_repos, 1):
+        commits_by_repo = repo_manager.fetch_all_commits_sync([repo.full_name for repo in recent_repos])
+        
+        for i, (repo, commits) in enumerate(zip(recent_repos, commits_by_repo), 1):
             st.write(f"{i}. **{repo.name}** - Last updated: {format_datetime(repo.updated_at)}")
-            commits = repo_manager.get_repo_commits(repo)
             
             if commits:
                 if show_all_commits:
                     for commit in commits:
-                        all_commits.append({
-                            'repo': repo.name,
-                            'message': commit.commit.message,
-                            'date': commit.commit.author.date,
-                            'author': commit.commit.author.name,
-                            'url': commit.html_url
-                        })
+                        repo_col.append(repo.name)
+                        msg_col.append(commit['commit']['message'])
+                        date_col.append(commit['commit']['author']['date'])
+                        author_col.append(commit['commit']['author']['name'])
+                        url_col.append(commit['html_url'])
                 else:
                     with st.expander(f"Show commits for {repo.name}"):
                         for commit in commits:
-                            st.write(f"- {commit.commit.message} ({format_datetime(commit.commit.author.date)})")
+                            commit_date = pd.to_datetime(commit['commit']['author']['date'], format='ISO8601')
+                            st.write(f"- {commit['commit']['message']} ({format_datetime(commit_date)})")
             else:
                 st.write("No commits found in this repository.")
         
-        if show_all_commits and all_commits:
+        if show_all_commits and repo_col:
             st.subheader("All Recent Commits")
             filter_user_commits = st.checkbox("Show only my commits", value=True)
-            df_commits = pd.DataFrame(all_commits)
-            df_commits['date'] = pd.to_datetime(df_commits['date']).dt.strftime("%b %d, %Y %I:%M %p")
+            df_commits = pd.DataFrame({
+                'repo': repo_col,
+                'message': msg_col,
+                'date': pd.to_datetime(date_col, utc=True, format='ISO8601'),
+                'author': author_col,
+                'url': url_col
+            })
             
             if filter_user_commits:
                 user_login = repo_manager.user.login
                 user_name = repo_manager.user.name
                 st.write(f"Filtering commits by {user_login} (username) and {user_name} (full name)")
                 
-                # Create summary for owned repos
-                owned_repos = df_commits[df_commits['author'].isin([user_login, user_name])]
+                # Split commits by authorship in a single groupby pass
+                is_mine = df_commits['author'].isin({user_login, user_name})
+                counts = (
+                    df_commits.groupby(is_mine)
+                    .agg(commits=('repo', 'size'), repos=('repo', 'nunique'))
+                    .reindex([True, False], fill_value=0)
+                )
                 owned_summary = f"""
-                You have made <span style='color:#4CAF50;font-weight:bold;'>{len(owned_repos)}</span> commits 
-                across <span style='color:#4CAF50;font-weight:bold;'>{owned_repos['repo'].nunique()}</span> repositories.
+                You have made <span style='color:#4CAF50;font-weight:bold;'>{counts.loc[True, 'commits']}</span> commits 
+                across <span style='color:#4CAF50;font-weight:bold;'>{counts.loc[True, 'repos']}</span> repositories.
                 """
                 
-                # Create summary for other repos
-                other_repos = df_commits[~df_commits['author'].isin([user_login, user_name])]
                 other_summary = f"""
-                There are <span style='color:#2196F3;font-weight:bold;'>{len(other_repos)}</span> commits 
-                by other authors across <span style='color:#2196F3;font-weight:bold;'>{other_repos['repo'].nunique()}</span> repositories.
+                There are <span style='color:#2196F3;font-weight:bold;'>{counts.loc[False, 'commits']}</span> commits 
+                by other authors across <span style='color:#2196F3;font-weight:bold;'>{counts.loc[False, 'repos']}</span> repositories.
                 """
                 
                 st.markdown(owned_summary, unsafe_allow_html=True)
@@ -287,18 +346,22 @@ def main():
                 
                 # Display unique authors
                 st.write("Unique authors in the dataset:")
-                authors = df_commits['author'].unique()
-                for author in authors:
-                    color = '#4CAF50' if author in [user_login, user_name] else '#2196F3'
-                    st.markdown(f"<span style='color:{color};'>{author}</span>", unsafe_allow_html=True)
+                authors = df_commits['author'].drop_duplicates()
+                colors = np.where(authors.isin({user_login, user_name}), '#4CAF50', '#2196F3')
+                st.markdown(''.join(
+                    f"<span style='color:{color};margin-right:8px;'>{author}</span>"
+                    for author, color in zip(authors, colors)
+                ), unsafe_allow_html=True)
                 
-                df_filtered = owned_repos
+                df_filtered = df_commits[is_mine]
                 st.write(f"Showing {len(df_filtered)} commits for {user_login}/{user_name}")
                 if len(df_filtered) == 0:
                     st.warning("No commits found for the current user. This might be due to a mismatch between your GitHub username/name and the commit author name.")
                 df_commits = df_filtered
             
-            st.dataframe(df_commits, use_container_width=True)
+            # Dates stay datetime64 for filtering and are only formatted for display
+            display_df = df_commits.assign(date=df_commits['date'].dt.strftime("%b %d, %Y %I:%M %p"))
+            st.dataframe(display_df, use_container_width=True)
         elif show_all_commits:
             st.write("No commits found in any of the recent repositories.")
         
@@ -311,8 +374,10 @@ def main():
             export_to_csv(all_commits_df, f"{repo_manager.user.login}_all_commits.csv")
         
         # Activity Timeline
-        activity_data = [{'repo': repo.name, 'date': repo.updated_at} for repo in recent_repos]
-        activity_df = pd.DataFrame(activity_data)
+        activity_df = pd.DataFrame({
+            'repo': [repo.name for repo in recent_repos],
+            'date': [repo.updated_at for repo in recent_repos]
+        })
         fig = px.scatter(activity_df, x="date", y="repo", title="Recent Repository Activity",
                          labels={"date": "Last Update", "repo": "Repository"},
                          hover_data=["date"])
@@ -325,7 +390,7 @@ def main():
         # Checkbox for formatting owned vs. non-owned repos
         format_owned = st.checkbox("Format Owned vs. Non-Owned", value=True)
 
-        df = repo_manager.get_repos_dataframe()
+        df = get_repos_df(repo_manager)
         
         if format_owned:
             owned_count = df['is_owner'].sum()
@@ -344,14 +409,14 @@ def main():
         This section provides visual insights into your GitHub repositories using Plotly charts. 
         """)
         
-        df = repo_manager.get_repos_dataframe()
+        df = get_repos_df(repo_manager)
         
         col1, col2 = st.columns(2)
 
         with col1:
             # Language distribution
-            lang_counts = df['language'].value_counts()
-            fig = px.pie(values=lang_counts.values, names=lang_counts.index, title="Language Distribution")
+            lang_counts = _lang_counts(f"{user.login}_repos", df['language'])
+            fig = px.pie(lang_counts, values='count', names='language', title="Language Distribution")
             st.plotly_chart(fig, use_container_width=True)
 
         with col2:
@@ -370,7 +435,7 @@ def main():
         This section analyzes and visualizes your starred repositories on GitHub. 
         """)
         
-        starred_df = repo_manager.get_starred_repos()
+        starred_df = _cached_starred(repo_manager, user.login)
         
         # Ensure starred_df is a DataFrame
         if not isinstance(starred_df, pd.DataFrame):
@@ -383,14 +448,14 @@ def main():
         st.dataframe(starred_df, use_container_width=True)
         
         # Language breakdown pie chart
-        lang_counts = starred_df['language'].value_counts()
-        fig = px.pie(values=lang_counts.values, names=lang_counts.index, title="Language Distribution of Starred Repositories")
+        lang_counts = _lang_counts(f"{user.login}_starred", starred_df['language'])
+        fig = px.pie(lang_counts, values='count', names='language', title="Language Distribution of Starred Repositories")
         st.plotly_chart(fig, use_container_width=True)
         
         # Top 10 most starred repositories
-        top_10_starred = starred_df.nlargest(10, 'stars')
-        fig = go.Figure(data=[go.Bar(x=top_10_starred['name'], y=top_10_starred['stars'])])
-        fig.update_layout(title="Top 10 Most Starred Repositories", xaxis_title="Repository", yaxis_title="Stars")
+        top_10_starred = _top_starred(f"{user.login}_starred", starred_df)
+        fig = px.bar(top_10_starred, x='name', y='stars', title="Top 10 Most Starred Repositories")
+        fig.update_layout(xaxis_title="Repository", yaxis_title="Stars")
         st.plotly_chart(fig, use_container_width=True)
         
         # Export to CSV
@@ -1,19 +1,28 @@
 import os
 import argparse
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 from dotenv import load_dotenv
 from github_repo_manager import GithubRepoManager
 from pathlib import Path
 
 
+def write_excel(df, output):
+    import pandas as pd
+
+    # Excel has no timezone support, so timestamps are written as naive UTC
+    df = df.copy()
+    for column in df.select_dtypes(include=['datetimetz']).columns:
+        df[column] = df[column].dt.tz_localize(None)
+    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+        df.to_excel(writer, index=False)
+
 def export_data(repo_manager, format, output):
     df = repo_manager.get_repos_dataframe()
     if format == 'csv':
         df.to_csv(output, index=False)
     elif format == 'xlsx':
-        df.to_excel(output, index=False)
+        write_excel(df, output)
+    elif format == 'parquet':
+        df.to_parquet(output, index=False)
     print(f"Data exported to {output}")
 
 def export_stars(repo_manager, format, output):
@@ -21,10 +30,15 @@ def export_stars(repo_manager, format, output):
     if format == 'csv':
         starred_df.to_csv(output, index=False)
     elif format == 'xlsx':
-        starred_df.to_excel(output, index=False)
+        write_excel(starred_df, output)
+    elif format == 'parquet':
+        starred_df.to_parquet(output, index=False)
     print(f"Starred repositories exported to {output}")
 
 def visualize(repo_manager, type, output):
+    # Plotly (and kaleido for write_image) are only imported for the action that needs them
+    import plotly.express as px
+
     df = repo_manager.get_repos_dataframe()
     if type == 'language_distribution':
         lang_counts = df['language'].value_counts()
@@ -60,7 +74,7 @@ def main():
     parser.add_argument('--name', help="Repository name for create/delete actions")
     parser.add_argument('--description', help="Repository description for create action")
     parser.add_argument('--private', action='store_true', help="Make repository private (for create action)")
-    parser.add_argument('--format', choices=['csv', 'xlsx'], help="Export format for data/stars")
+    parser.add_argument('--format', choices=['csv', 'xlsx', 'parquet'], help="Export format for data/stars")
     parser.add_argument('--output', help="Output file name for export/visualize actions")
     parser.add_argument('--type', choices=['language_distribution', 'stars_vs_forks', 'creation_timeline'], help="Visualization type")
 
@@ -1,11 +1,179 @@
+import asyncio
+import json
+import logging
+import time
+from email.utils import parsedate_to_datetime
+from functools import cached_property, wraps
 from github import Github, GithubException
+from github.Requester import HTTPSRequestsConnectionClass
 import pandas as pd
+import requests
+from urllib3.util.retry import Retry
 
-class GithubRepoManager:
+logger = logging.getLogger(__name__)
+
+REST_API_URL = "https://api.github.com"
+GRAPHQL_URL = "https://api.github.com/graphql"
+GRAPHQL_REPOS_PER_QUERY = 50  # Keeps each aliased query well under GraphQL's node limit
+
+COMMIT_HISTORY_FRAGMENT = """
+fragment CommitHistory on Repository {
+  defaultBranchRef {
+    target {
+      ... on Commit {
+        history(first: %d) {
+          nodes { oid message url author { name date } }
+        }
+      }
+    }
+  }
+}
+"""
+
+VIEWER_QUERY = """
+query($withRepos: Boolean!, $reposCursor: String, $withStarred: Boolean!, $starredCursor: String) {
+  viewer {
+    repositories(
+      first: 100
+      after: $reposCursor
+      affiliations: [OWNER, COLLABORATOR, ORGANIZATION_MEMBER]
+      ownerAffiliations: [OWNER, COLLABORATOR, ORGANIZATION_MEMBER]
+      orderBy: {field: UPDATED_AT, direction: DESC}
+    ) @include(if: $withRepos) {
+      nodes { ...RepoFields }
+      pageInfo { endCursor hasNextPage }
+    }
+    starredRepositories(first: 100, after: $starredCursor, orderBy: {field: STARRED_AT, direction: DESC}) @include(if: $withStarred) {
+      nodes { ...RepoFields }
+      pageInfo { endCursor hasNextPage }
+    }
+  }
+}
+
+fragment RepoFields on Repository {
+  name
+  nameWithOwner
+  description
+  primaryLanguage { name }
+  stargazerCount
+  forkCount
+  isFork
+  isArchived
+  isPrivate
+  createdAt
+  updatedAt
+  url
+  owner { login }
+  viewerPermission
+}
+"""
+
+MAX_RETRIES = 5
+MAX_RETRY_WAIT = 60  # Longer waits (e.g. an exhausted hourly quota) are surfaced instead of slept through
+# PyGithub only retries dropped connections; rate limits are left to gh_retry so the two layers don't multiply
+CONNECTION_RETRY = Retry(total=3, status=0, respect_retry_after_header=False)
+
+def _retry_delay(status, message, headers, attempt):
+    # Seconds to back off before retrying a rate-limited response, or None if it should not be retried
+    if status not in (403, 429) or 'rate limit' not in str(message).lower():
+        return None
+    headers = {key.lower(): value for key, value in (headers or {}).items()}
+    if 'retry-after' in headers:
+        retry_after = headers['retry-after']
+        if str(retry_after).isdigit():
+            delay = int(retry_after)
+        else:  # HTTP-date form
+            delay = max(int(parsedate_to_datetime(retry_after).timestamp() - time.time()), 1)
+    elif headers.get('x-ratelimit-remaining') == '0' and 'x-ratelimit-reset' in headers:
+        delay = max(int(headers['x-ratelimit-reset']) - int(time.time()), 1)
+    else:
+        delay = 2 ** attempt
+    return delay if delay <= MAX_RETRY_WAIT else None
+
+def gh_retry(fn):
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        for attempt in range(MAX_RETRIES):
+            try:
+                return fn(*args, **kwargs)
+            except GithubException as e:
+                delay = _retry_delay(e.status, e.data, e.headers, attempt)
+                if delay is None or attempt == MAX_RETRIES - 1:
+                    raise
+                time.sleep(delay)
+    return wrapper
+
+class _BearerAuth(requests.auth.AuthBase):
+    # Set on the session itself: a session without auth lets requests replace the header from ~/.netrc
     def __init__(self, token):
-        self.g = Github(token)
+        self.token = token
+
+    def __call__(self, request):
+        request.headers["Authorization"] = f"Bearer {self.token}"
+        return request
+
+def _connection_class_for(session):
+    # PyGithub builds its own requests.Session per connection; this variant reuses ours instead
+    class SessionConnection(HTTPSRequestsConnectionClass):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            session.mount("https://", self.adapter)
+            self.session = session
+
+        def close(self):
+            pass  # The session belongs to GithubRepoManager
+
+    return SessionConnection
+
+class GithubRepoManager:
+    def __init__(self, token, session=None):
+        self._token = token
+        self.session = session or requests.Session()  # Reused for GraphQL calls so the connection is kept alive
+        self.session.auth = _BearerAuth(token)
+        self.g = Github(token, retry=CONNECTION_RETRY)
+        if session is not None:
+            # Route PyGithub's REST calls through the given session, e.g. an ETag-aware cache
+            self.g.requester._Requester__connectionClass = _connection_class_for(session)
         self.user = self.g.get_user()
-        self.all_repos = list(self.user.get_repos(type='all', sort='updated', direction='desc'))
+        self._all_repos = None
+        self._repos_raw = None
+        self._starred_raw = None
+
+    @property
+    def all_repos(self):
+        # Listed on first use so cached callers never have to walk the paginated endpoint
+        if self._all_repos is None:
+            self.refresh_repos()
+        return self._all_repos
+
+    def _bootstrap_graphql(self):
+        # Repositories and stars share one query; later pages only ask for connections that have more
+        repos, starred = [], []
+        variables = {"withRepos": True, "reposCursor": None, "withStarred": True, "starredCursor": None}
+        while variables["withRepos"] or variables["withStarred"]:
+            viewer = self._graphql(VIEWER_QUERY, variables)["viewer"]
+            for field, nodes, flag, cursor in (
+                ("repositories", repos, "withRepos", "reposCursor"),
+                ("starredRepositories", starred, "withStarred", "starredCursor"),
+            ):
+                if variables[flag]:
+                    connection = viewer[field]
+                    # Repositories the token may not see (e.g. SAML-protected orgs) come back as null nodes
+                    nodes.extend(node for node in connection["nodes"] if node)
+                    variables[flag] = connection["pageInfo"]["hasNextPage"]
+                    variables[cursor] = connection["pageInfo"]["endCursor"]
+        self._repos_raw = repos
+        self._starred_raw = starred
+
+    def _ensure_bootstrapped(self):
+        if self._repos_raw is None or self._starred_raw is None:
+            self._bootstrap_graphql()
+
+    @cached_property
+    def admin_repo_names(self):
+        # viewerPermission comes with the GraphQL listing, so no per-repository permission lookups
+        self._ensure_bootstrapped()
+        return [repo['name'] for repo in self._repos_raw if repo['viewerPermission'] == 'ADMIN']
 
     def count_and_print_repos(self):
         try:
@@ -50,14 +218,16 @@ class GithubRepoManager:
                 print(f"An error occurred: {e}")
 
     def get_repo_stats(self):
-        total_count = len(self.all_repos)
-        fork_count = len([repo for repo in self.all_repos if repo.fork])
+        self._ensure_bootstrapped()
+        repos = self._repos_raw
+        total_count = len(repos)
+        fork_count = len([repo for repo in repos if repo['isFork']])
         non_fork_count = total_count - fork_count
-        archived_count = len([repo for repo in self.all_repos if repo.archived])
+        archived_count = len([repo for repo in repos if repo['isArchived']])
         non_archived_count = total_count - archived_count
-        public_count = len([repo for repo in self.all_repos if not repo.private])
-        private_count = len([repo for repo in self.all_repos if repo.private])
-        org_count = len([repo for repo in self.all_repos if repo.owner.login != self.user.login])
+        public_count = len([repo for repo in repos if not repo['isPrivate']])
+        private_count = len([repo for repo in repos if repo['isPrivate']])
+        org_count = len([repo for repo in repos if repo['owner']['login'] != self.user.login])
         owned_count = total_count - org_count
 
         return {
@@ -74,25 +244,38 @@ class GithubRepoManager:
 
     def get_repos_dataframe(self):
         try:
+            self._ensure_bootstrapped()
             data = []
-            for repo in self.all_repos:
+            for repo in self._repos_raw:
                 data.append({
-                    'name': repo.name,
-                    'full_name': repo.full_name,
-                    'description': repo.description,
-                    'language': repo.language,
-                    'stars': repo.stargazers_count,
-                    'forks': repo.forks_count,
-                    'is_fork': repo.fork,
-                    'is_archived': repo.archived,
-                    'is_private': repo.private,
-                    'created_at': repo.created_at,
-                    'updated_at': repo.updated_at,
-                    'url': repo.html_url,
-                    'owner': repo.owner.login,
-                    'is_owner': repo.owner.login == self.user.login
+                    'name': repo['name'],
+                    'full_name': repo['nameWithOwner'],
+                    'description': repo['description'],
+                    'language': (repo['primaryLanguage'] or {}).get('name'),
+                    'stars': repo['stargazerCount'],
+                    'forks': repo['forkCount'],
+                    'is_fork': repo['isFork'],
+                    'is_archived': repo['isArchived'],
+                    'is_private': repo['isPrivate'],
+                    'created_at': repo['createdAt'],
+                    'updated_at': repo['updatedAt'],
+                    'url': repo['url'],
+                    'owner': repo['owner']['login'],
+                    'is_owner': repo['owner']['login'] == self.user.login
                 })
-            return pd.DataFrame(data)
+            df = pd.DataFrame(data)
+            if not df.empty:
+                df['created_at'] = pd.to_datetime(df['created_at'], utc=True, format='ISO8601')
+                df['updated_at'] = pd.to_datetime(df['updated_at'], utc=True, format='ISO8601')
+                df = df.astype({
+                    'is_fork': 'bool',
+                    'is_archived': 'bool',
+                    'is_private': 'bool',
+                    'is_owner': 'bool',
+                    'language': 'category',
+                    'owner': 'category'
+                })
+            return df
         except GithubException as e:
             print(f"An error occurred: {e}")
             return None
@@ -100,39 +283,112 @@ class GithubRepoManager:
     def get_recent_repos(self, limit=10):
         return sorted(self.all_repos, key=lambda r: r.updated_at, reverse=True)[:limit]
 
-    def get_repo_commits(self, repo, limit=5):
-        try:
-            return list(repo.get_commits()[:limit])
-        except GithubException as e:
-            if e.status == 409:  # Empty repository
-                return []
-            else:
-                raise e
+    @gh_retry
+    def _graphql(self, query, variables=None):
+        response = self.session.post(
+            GRAPHQL_URL,
+            json={"query": query, "variables": variables or {}},
+        )
+        if not response.ok:
+            raise GithubException(response.status_code, response.text, dict(response.headers))
+        payload = response.json()
+        if payload.get("data") is None:
+            raise GithubException(response.status_code, payload, dict(response.headers))
+        # Partial errors mean some results were withheld, so the data should not be read as complete
+        for error in payload.get("errors", []):
+            logger.warning("GitHub GraphQL returned partial results: %s", error.get("message", error))
+        return payload["data"]
+
+    def get_all_commits_graphql(self, repos, limit=100):
+        # Collected column by column so pandas builds each Series straight from a list
+        repo_col, msg_col, date_col, author_col, url_col = [], [], [], [], []
+        for start in range(0, len(repos), GRAPHQL_REPOS_PER_QUERY):
+            chunk = repos[start:start + GRAPHQL_REPOS_PER_QUERY]
+            aliases = "\n".join(
+                f"r{i}: repository(owner: {json.dumps(repo.owner.login)}, name: {json.dumps(repo.name)}) {{ ...CommitHistory }}"
+                for i, repo in enumerate(chunk)
+            )
+            data = self._graphql(f"query {{\n{aliases}\n}}\n" + COMMIT_HISTORY_FRAGMENT % limit)
+
+            for i, repo in enumerate(chunk):
+                node = data.get(f"r{i}")
+                # Missing or empty repositories have no default branch to walk
+                if not node or not node["defaultBranchRef"]:
+                    continue
+                for commit in node["defaultBranchRef"]["target"]["history"]["nodes"]:
+                    author = commit["author"] or {}
+                    repo_col.append(repo.name)
+                    msg_col.append(commit["message"])
+                    date_col.append(author.get("date"))
+                    author_col.append(author.get("name"))
+                    url_col.append(commit["url"])
+        return pd.DataFrame({
+            'repo': repo_col,
+            'message': msg_col,
+            'date': pd.to_datetime(date_col, utc=True, format='ISO8601'),
+            'author': author_col,
+            'url': url_col
+        })
+
+    async def _fetch_commits_async(self, session, semaphore, repo_full_name, limit):
+        for attempt in range(MAX_RETRIES):
+            async with semaphore:
+                async with session.get(f"{REST_API_URL}/repos/{repo_full_name}/commits", params={"per_page": limit}) as response:
+                    if response.status == 409:  # Empty repository
+                        return []
+                    if response.ok:
+                        return await response.json()
+                    delay = _retry_delay(response.status, await response.text(), response.headers, attempt)
+                    if delay is None or attempt == MAX_RETRIES - 1:
+                        response.raise_for_status()
+            # Back off outside the semaphore so other repositories keep their slots
+            await asyncio.sleep(delay)
+
+    async def _fetch_all_commits_async(self, full_names, limit, max_concurrency):
+        import aiohttp  # Only the Streamlit Activity tab fetches this way, so the CLI never loads it
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+        headers = {"Authorization": f"Bearer {self._token}", "Accept": "application/vnd.github+json"}
+        # One client session for the whole batch so TCP and TLS setup is shared
+        async with aiohttp.ClientSession(headers=headers) as session:
+            return await asyncio.gather(*(
+                self._fetch_commits_async(session, semaphore, full_name, limit) for full_name in full_names
+            ))
+
+    def fetch_all_commits_sync(self, full_names, limit=5, max_concurrency=8):
+        return asyncio.run(self._fetch_all_commits_async(full_names, limit, max_concurrency))
 
     def delete_repo(self, repo_name):
-        repo = self.user.get_repo(repo_name)
-        repo.delete()
+        # Retry each call on its own so a rate-limited refresh never re-runs the deletion
+        repo = gh_retry(self.user.get_repo)(repo_name)
+        gh_retry(repo.delete)()
+        self._clear_http_cache()
         self.refresh_repos()  # Refresh the list of repositories after deletion
 
+    @gh_retry
     def refresh_repos(self):
-        self.all_repos = list(self.user.get_repos(type='all', sort='updated', direction='desc'))
+        self._all_repos = list(self.user.get_repos(type='all', sort='updated', direction='desc'))
+        self._repos_raw = None
+        self._starred_raw = None
+        self.__dict__.pop('admin_repo_names', None)
 
 
     def get_starred_repos(self):
-        starred_repos = list(self.user.get_starred())
+        self._ensure_bootstrapped()
         starred_data = []
-        for repo in starred_repos:
+        for repo in self._starred_raw:
             starred_data.append({
-                'name': repo.name,
-                'owner': repo.owner.login,
-                'language': repo.language or 'Unknown',
-                'stars': repo.stargazers_count,
-                'forks': repo.forks_count,
-                'url': repo.html_url,
-                'description': repo.description
+                'name': repo['name'],
+                'owner': repo['owner']['login'],
+                'language': (repo['primaryLanguage'] or {}).get('name') or 'Unknown',
+                'stars': repo['stargazerCount'],
+                'forks': repo['forkCount'],
+                'url': repo['url'],
+                'description': repo['description']
             })
         return pd.DataFrame(starred_data)
 
+    @gh_retry
     def create_repo(self, name, description=None, private=False, auto_init=False, gitignore_template=None, license_template=None):
         kwargs = {
             "name": name,
@@ -147,8 +403,17 @@ class GithubRepoManager:
         if license_template:
             kwargs["license_template"] = license_template
         
-        return self.g.get_user().create_repo(**kwargs)
+        repo = self.g.get_user().create_repo(**kwargs)
+        self._clear_http_cache()
+        return repo
+
+    def _clear_http_cache(self):
+        # Cached listings would otherwise hide a write until their max-age runs out
+        if hasattr(self.session, 'cache'):
+            self.session.cache.clear()
 
     def __del__(self):
         if hasattr(self, 'g'):
-            self.g.close()
\ No newline at end of file
+            self.g.close()
+        if hasattr(self, 'session'):
+            self.session.close()
\ No newline at end of file